@@ -1,35 +1,157 @@
 import os
+import click
+import sqlalchemy as sa
 from datetime import datetime, timedelta
-from flask import Flask, render_template, redirect, url_for, flash, request, send_file
+from flask import Flask, render_template, redirect, url_for, flash, request, send_file, abort
 from flask_sqlalchemy import SQLAlchemy
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
-from werkzeug.security import check_password_hash, generate_password_hash
 
 from models import db, User, Tournament, Player, Match
 from forms import LoginForm, RegisterForm, NewTournamentForm, EditMatchForm
 from tournament_logic import generate_bracket_with_byes, propagate_winner_up
-from bracket_image import render_bracket_image
+from bracket_cache import create_bracket_cache
+from auth import PasswordHasher, HasherBusy, Throttle, UserCache
+from player_index import resolve_identity, record_match_result, index_tournament, reindex_all
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
-def create_app():
+def init_db(app):
+    """
+    Cria as tabelas do banco. Executado explicitamente (flask init-db)
+    em vez de a cada subida de processo. Também adiciona colunas novas
+    (anuláveis) e índices novos a tabelas já existentes, que o create_all
+    não altera.
+    """
+    with app.app_context():
+        db.create_all()
+        inspector = sa.inspect(db.engine)
+        quote = db.engine.dialect.identifier_preparer.quote
+        with db.engine.begin() as conn:
+            for table in db.metadata.sorted_tables:
+                existing = {c['name'] for c in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in existing and column.nullable:
+                        col_type = column.type.compile(dialect=db.engine.dialect)
+                        conn.execute(sa.text(
+                            f'ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {col_type}'
+                        ))
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+
+def create_app(test_config=None):
     app = Flask(__name__)
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev_secret_key')
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(BASE_DIR, 'tennis.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+        'DATABASE_URL', 'sqlite:///' + os.path.join(BASE_DIR, 'tennis.db')
+    )
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Cache das chaves: só liga com um nível compartilhado entre workers
+    app.config['BRACKET_CACHE_DIR'] = os.environ.get('BRACKET_CACHE_DIR')
+    app.config['BRACKET_CACHE_REDIS_URL'] = os.environ.get('BRACKET_CACHE_REDIS_URL')
+    app.config['BRACKET_CACHE_SIZE'] = int(os.environ.get('BRACKET_CACHE_SIZE', 128))
+    # Autenticação: executor de hash, limites de tentativas e cache do user_loader
+    workers = os.environ.get('AUTH_HASH_WORKERS')
+    app.config['AUTH_HASH_WORKERS'] = int(workers) if workers else None    # None = nº de CPUs
+    app.config['AUTH_HASH_QUEUE'] = int(os.environ.get('AUTH_HASH_QUEUE', 64))
+    app.config['AUTH_HASH_TIMEOUT'] = float(os.environ.get('AUTH_HASH_TIMEOUT', 10))  # segundos
+    # ex.: 'scrypt:32768:8:1' ou 'pbkdf2:sha256:600000' (None = padrão do werkzeug)
+    app.config['AUTH_HASH_METHOD'] = os.environ.get('AUTH_HASH_METHOD')
+    app.config['AUTH_THROTTLE_WINDOW'] = int(os.environ.get('AUTH_THROTTLE_WINDOW', 60))  # segundos
+    # Por IP: logins falhos + cadastros. Alto o bastante para um Wi-Fi de evento inteiro
+    app.config['AUTH_THROTTLE_IP_LIMIT'] = int(os.environ.get('AUTH_THROTTLE_IP_LIMIT', 200))
+    app.config['AUTH_THROTTLE_EMAIL_LIMIT'] = int(os.environ.get('AUTH_THROTTLE_EMAIL_LIMIT', 10))  # logins falhos
+    app.config['AUTH_THROTTLE_MAX_KEYS'] = int(os.environ.get('AUTH_THROTTLE_MAX_KEYS', 10000))
+    app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 30))  # segundos
+    # Nº de proxies reversos à frente do app (X-Forwarded-For); 0 = acesso direto
+    app.config['PROXY_FIX_X_FOR'] = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+    if test_config:
+        app.config.update(test_config)
+
+    if app.config['PROXY_FIX_X_FOR']:
+        n = app.config['PROXY_FIX_X_FOR']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=n, x_proto=n)
 
     db.init_app(app)
 
+    bracket_cache = create_bracket_cache(app.config)
+    app.extensions['bracket_cache'] = bracket_cache
+
+    def load_bracket(tournament_id):
+        """Estado (somente leitura) do torneio do usuário atual, via cache; 404 se não for dele."""
+        state = bracket_cache.get(tournament_id, lambda: Tournament.query.get(tournament_id))
+        if state is None or state.user_id != current_user.id:
+            abort(404)
+        return state
+
+    hasher = PasswordHasher(
+        max_workers=app.config['AUTH_HASH_WORKERS'],
+        max_pending=app.config['AUTH_HASH_QUEUE'],
+        method=app.config['AUTH_HASH_METHOD'],
+        timeout=app.config['AUTH_HASH_TIMEOUT'],
+    )
+    ip_throttle = Throttle(app.config['AUTH_THROTTLE_IP_LIMIT'], app.config['AUTH_THROTTLE_WINDOW'],
+                           max_keys=app.config['AUTH_THROTTLE_MAX_KEYS'])
+    email_throttle = Throttle(app.config['AUTH_THROTTLE_EMAIL_LIMIT'], app.config['AUTH_THROTTLE_WINDOW'],
+                              max_keys=app.config['AUTH_THROTTLE_MAX_KEYS'])
+    app.extensions['auth_throttles'] = (ip_throttle, email_throttle)
+    user_cache = UserCache(ttl=app.config['USER_CACHE_TTL'])
+    app.extensions['user_cache'] = user_cache
+
     login_manager = LoginManager()
     login_manager.login_view = 'login'
     login_manager.init_app(app)
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
-
-    with app.app_context():
-        db.create_all()
+        user_id = int(user_id)
+        cached = user_cache.get(user_id)
+        if cached is None:
+            user = User.query.get(user_id)
+            if user is None:
+                return None
+            # Guarda uma cópia desanexada: commits da requisição não a expiram
+            db.session.expunge(user)
+            user_cache.set(user_id, user)
+            cached = user
+        # Reanexa à sessão atual sem ir ao banco
+        return db.session.merge(cached, load=False)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Cria (ou completa) o schema do banco."""
+        init_db(app)
+        click.echo('Banco de dados inicializado.')
+
+    @app.cli.command('export-snapshot')
+    @click.argument('path')
+    @click.option('--tournament', 'tournament_ids', type=int, multiple=True, help='Id do torneio (repetível).')
+    @click.option('--user', 'user_id', type=int, help='Exporta todo o histórico do usuário.')
+    def export_snapshot_command(path, tournament_ids, user_id):
+        """Exporta torneios para um snapshot NDJSON (.gz opcional)."""
+        from snapshot import dump_snapshot, open_snapshot
+        with open_snapshot(path, 'w') as fp:
+            count = dump_snapshot(fp, tournament_ids=list(tournament_ids) or None, user_id=user_id)
+        click.echo(f'{count} registros exportados para {path}.')
+
+    @app.cli.command('import-snapshot')
+    @click.argument('path')
+    @click.option('--user', 'user_id', type=int, required=True, help='Usuário dono dos torneios importados.')
+    def import_snapshot_command(path, user_id):
+        """Importa um snapshot NDJSON para o usuário informado."""
+        from snapshot import load_snapshot, open_snapshot
+        with open_snapshot(path, 'r') as fp:
+            tournament_ids = load_snapshot(fp, user_id)
+        reindex_all(db, tournament_ids)
+        for tid in tournament_ids:
+            bracket_cache.invalidate(tid)
+        click.echo(f'{len(tournament_ids)} torneio(s) importado(s).')
+
+    @app.cli.command('resolve-players')
+    def resolve_players_command():
+        """Liga jogadores às identidades globais e reconstrói o índice de confrontos."""
+        count = reindex_all(db)
+        click.echo(f'{count} torneio(s) indexado(s).')
 
     @app.route('/')
     def index():
@@ -43,10 +165,27 @@ def create_app():
             return redirect(url_for('my_tournaments'))
         form = LoginForm()
         if form.validate_on_submit():
-            user = User.query.filter_by(email=form.email.data.lower().strip()).first()
-            if user and check_password_hash(user.password_hash, form.password.data):
+            email = form.email.data.lower().strip()
+            ip = request.remote_addr
+            # Só tentativas falhas contam: um check-in com todos no mesmo IP não é barrado
+            if not ip_throttle.allowed(ip) or not email_throttle.allowed(email):
+                flash('Muitas tentativas. Aguarde um minuto e tente novamente.', 'warning')
+                return render_template('login.html', form=form), 429
+            user = User.query.filter_by(email=email).first()
+            pwhash = user.password_hash if user else None
+            # Devolve a conexão ao pool enquanto espera na fila do hash
+            db.session.close()
+            try:
+                valid = pwhash is not None and hasher.check(pwhash, form.password.data)
+            except HasherBusy:
+                flash('Servidor ocupado. Tente novamente em instantes.', 'warning')
+                return render_template('login.html', form=form), 503
+            if valid:
+                email_throttle.reset(email)
                 login_user(user)
                 return redirect(url_for('my_tournaments'))
+            ip_throttle.hit(ip)
+            email_throttle.hit(email)
             flash('E-mail ou senha inválidos', 'danger')
         return render_template('login.html', form=form)
 
@@ -56,13 +195,23 @@ def create_app():
             return redirect(url_for('my_tournaments'))
         form = RegisterForm()
         if form.validate_on_submit():
+            if not ip_throttle.hit(request.remote_addr):
+                flash('Muitas tentativas. Aguarde um minuto e tente novamente.', 'warning')
+                return render_template('register.html', form=form), 429
             if User.query.filter_by(email=form.email.data.lower().strip()).first():
                 flash('E-mail já cadastrado.', 'warning')
                 return redirect(url_for('register'))
+            # Devolve a conexão ao pool enquanto espera na fila do hash
+            db.session.close()
+            try:
+                password_hash = hasher.hash(form.password.data)
+            except HasherBusy:
+                flash('Servidor ocupado. Tente novamente em instantes.', 'warning')
+                return render_template('register.html', form=form), 503
             user = User(
                 name=form.name.data.strip(),
                 email=form.email.data.lower().strip(),
-                password_hash=generate_password_hash(form.password.data)
+                password_hash=password_hash
             )
             db.session.add(user)
             db.session.commit()
@@ -73,6 +222,7 @@ def create_app():
     @app.route('/logout')
     @login_required
     def logout():
+        user_cache.invalidate(current_user.id)
         logout_user()
         return redirect(url_for('login'))
 
@@ -129,9 +279,10 @@ def create_app():
 
             # Criar players
             player_objs = []
+            identity_cache = {}
             for p in input_players:
                 player = Player(tournament_id=t.id, name=p)
-                db.session.add(player)
+                resolve_identity(db, player, current_user.id, identity_cache)
                 player_objs.append(player)
             db.session.flush()
 
@@ -156,6 +307,7 @@ def create_app():
                     db.session.add(m)
 
             db.session.commit()
+            bracket_cache.invalidate(t.id)
             flash('Torneio criado com sucesso!', 'success')
             return redirect(url_for('tournament_detail', tournament_id=t.id))
 
@@ -164,34 +316,52 @@ def create_app():
     @app.route('/tournament/<int:tournament_id>', methods=['GET', 'POST'])
     @login_required
     def tournament_detail(tournament_id):
-        t = Tournament.query.filter_by(id=tournament_id, user_id=current_user.id).first_or_404()
-
         # Atualização inline de nomes de jogadores e horários
         if request.method == 'POST':
+            t = Tournament.query.filter_by(id=tournament_id, user_id=current_user.id).first_or_404()
             # Atualizar nomes dos jogadores
+            renamed = False
             for p in t.players:
                 new_name = request.form.get(f'player_{p.id}')
-                if new_name is not None and new_name.strip():
+                if new_name is not None and new_name.strip() and new_name.strip() != p.name:
                     p.name = new_name.strip()
+                    renamed = True
 
             # Atualizar horários dos jogos (cada match tem date_time string)
+            rescheduled = []
             for m in t.matches:
                 dt_str = request.form.get(f'match_dt_{m.id}')
                 if dt_str is not None:
                     dt_str = dt_str.strip()
+                    new_dt = m.date_time
                     if dt_str:
                         try:
                             # formato: 2025-09-01T18:30 (input type="datetime-local")
-                            m.date_time = datetime.fromisoformat(dt_str)
+                            new_dt = datetime.fromisoformat(dt_str)
                         except Exception:
                             pass
                     else:
-                        m.date_time = None
+                        new_dt = None
+                    if new_dt != m.date_time:
+                        m.date_time = new_dt
+                        rescheduled.append(m)
+
+            # Só refaz o índice do que mudou: nomes trocam identidades (torneio
+            # inteiro); horários mudam só o played_at dos próprios jogos
+            if renamed:
+                db.session.flush()
+                index_tournament(db, t)
+            else:
+                for m in rescheduled:
+                    record_match_result(db, m)
 
             db.session.commit()
+            bracket_cache.invalidate(t.id)
             flash('Jogadores e horários atualizados!', 'success')
             return redirect(url_for('tournament_detail', tournament_id=t.id))
 
+        t = load_bracket(tournament_id)
+
         # Organizar matches por round e posição
         rounds = {}
         for m in t.matches:
@@ -258,7 +428,15 @@ def create_app():
             if m.winner_name:
                 propagate_winner_up(db, m)
 
+            record_match_result(db, m)
+            if m.next_match_id:
+                # O próximo jogo pode ter trocado de jogador: refaz o índice dele também
+                next_m = Match.query.get(m.next_match_id)
+                if next_m:
+                    record_match_result(db, next_m)
+
             db.session.commit()
+            bracket_cache.invalidate(t.id)
             flash('Resultado atualizado!', 'success')
             return redirect(url_for('tournament_detail', tournament_id=t.id))
 
@@ -276,7 +454,9 @@ def create_app():
     @app.route('/tournament/<int:tournament_id>/image')
     @login_required
     def tournament_image(tournament_id):
-        t = Tournament.query.filter_by(id=tournament_id, user_id=current_user.id).first_or_404()
+        t = load_bracket(tournament_id)
+        # Pillow só é carregado no primeiro uso (reduz o tempo de boot dos workers)
+        from bracket_image import render_bracket_image
         img_path = os.path.join(BASE_DIR, f'tournament_{t.id}.png')
         render_bracket_image(t, img_path, width=1920, height=1080)  # 16:9 (Instagram landscape)
         return send_file(img_path, mimetype='image/png', as_attachment=True, download_name=f'{t.name}.png')
@@ -285,4 +465,5 @@ def create_app():
 
 if __name__ == '__main__':
     app = create_app()
+    init_db(app)  # servidor de desenvolvimento: garante o schema
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+Apoio à autenticação sob carga (picos de check-in):
+- PasswordHasher: hash/verificação de senha em um executor limitado;
+- Throttle: limite de eventos por chave (IP, e-mail) em janela deslizante;
+- UserCache: cache curto (TTL) para o user_loader do Flask-Login.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+class HasherBusy(RuntimeError):
+    """Fila do executor de hash cheia, ou espera maior que o timeout."""
+
+class PasswordHasher:
+    """
+    Executa generate/check_password_hash fora das threads de requisição, com no
+    máximo max_workers hashes simultâneos e max_pending na fila. Quando a fila
+    está cheia, levanta HasherBusy em vez de empilhar mais CPU.
+    """
+
+    def __init__(self, max_workers=None, max_pending=64, method=None, salt_length=16, timeout=10):
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.method = method
+        self.salt_length = salt_length
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pwhash')
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_pending)
+
+    def _run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy('Muitas operações de senha em andamento.')
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()  # se ainda estava na fila, não gasta CPU à toa
+            raise HasherBusy('Tempo de espera do hash de senha esgotado.')
+
+    def hash(self, password):
+        kwargs = {'salt_length': self.salt_length}
+        if self.method:
+            kwargs['method'] = self.method
+        return self._run(generate_password_hash, password, **kwargs)
+
+    def check(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+class Throttle:
+    """
+    Até 'limit' eventos por chave a cada 'window' segundos. Guarda no máximo
+    max_keys chaves: ao passar disso, descarta as chaves sem eventos na janela
+    e, se ainda faltar espaço, as usadas há mais tempo.
+    """
+
+    def __init__(self, limit, window, max_keys=10000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self, key, now):
+        q = self._hits.get(key)
+        if q is None:
+            return None
+        while q and q[0] <= now - self.window:
+            q.popleft()
+        if not q:
+            del self._hits[key]
+            return None
+        return q
+
+    def allowed(self, key):
+        """True se a chave ainda está abaixo do limite (não registra evento)."""
+        with self._lock:
+            q = self._prune(key, time.monotonic())
+            return q is None or len(q) < self.limit
+
+    def hit(self, key):
+        """Registra um evento; retorna False se a chave excedeu o limite."""
+        now = time.monotonic()
+        with self._lock:
+            q = self._prune(key, now)
+            if q is None:
+                self._hits[key] = deque([now])
+                if len(self._hits) > self.max_keys:
+                    self._evict(now)
+                return True
+            if len(q) >= self.limit:
+                return False
+            q.append(now)
+            self._hits.move_to_end(key)
+            return True
+
+    def _evict(self, now):
+        for key in list(self._hits):
+            self._prune(key, now)
+        # Libera uma folga de 10% para não varrer tudo a cada chave nova
+        while len(self._hits) > self.max_keys * 9 // 10:
+            self._hits.popitem(last=False)
+
+    def __len__(self):
+        return len(self._hits)
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+
+class UserCache:
+    """
+    Cache em processo de objetos User desanexados, por id, com TTL curto.
+    Deve ser invalidado no logout e em qualquer alteração de conta.
+    """
+
+    def __init__(self, ttl=30, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires < time.monotonic():
+                del self._data[user_id]
+                return None
+            return user
+
+    def set(self, user_id, user):
+        with self._lock:
+            if len(self._data) >= self.maxsize:
+                now = time.monotonic()
+                for k in [k for k, (exp, _) in self._data.items() if exp < now]:
+                    del self._data[k]
+                if len(self._data) >= self.maxsize:
+                    self._data.clear()
+            self._data[user_id] = (time.monotonic() + self.ttl, user)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
@@ -0,0 +1,86 @@
+"""
+Teste de carga de login: N logins simultâneos (padrão 200) contra o app com
+um banco SQLite temporário.
+
+Uso:
+    python bench_login.py [concorrencia] [--shared-ip]
+
+Com --shared-ip todos os clientes usam o mesmo endereço (check-in no Wi-Fi do
+evento, ou app atrás de proxy sem ProxyFix); sem ele, cada cliente tem o seu.
+
+Reporta tempo total, latências (p50/p95/máx) e a distribuição de status HTTP
+(302 = sucesso, 429 = limitado, 503 = executor de hash cheio).
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from app import create_app, init_db
+from auth import PasswordHasher
+from models import db, User
+
+PASSWORD = 'senha-de-teste'
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    shared_ip = '--shared-ip' in sys.argv[1:]
+    concurrency = int(args[0]) if args else 200
+    tmpdir = tempfile.mkdtemp()
+    app = create_app({
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmpdir, 'bench.db'),
+        'AUTH_HASH_QUEUE': concurrency,
+    })
+    init_db(app)
+
+    hasher = PasswordHasher(method=app.config['AUTH_HASH_METHOD'])
+    pwhash = hasher.hash(PASSWORD)
+    hasher.shutdown()
+    with app.app_context():
+        db.session.add_all([
+            User(name=f'Jogador {i}', email=f'user{i}@example.com', password_hash=pwhash)
+            for i in range(concurrency)
+        ])
+        db.session.commit()
+
+    latencies = [None] * concurrency
+    statuses = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency)
+
+    def worker(i):
+        client = app.test_client()
+        barrier.wait()
+        t0 = time.perf_counter()
+        resp = client.post(
+            '/login',
+            data={'email': f'user{i}@example.com', 'password': PASSWORD},
+            environ_base={'REMOTE_ADDR': '10.0.0.1' if shared_ip else f'10.0.{i // 250}.{i % 250 + 1}'},
+        )
+        latencies[i] = time.perf_counter() - t0
+        with lock:
+            statuses[resp.status_code] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - t0
+
+    lat = sorted(x * 1000 for x in latencies)
+    p95 = lat[max(0, int(len(lat) * 0.95) - 1)]
+    workers = app.config['AUTH_HASH_WORKERS'] or os.cpu_count()
+    mode = 'IP compartilhado' if shared_ip else 'IP por cliente'
+    print(f'logins: {concurrency} ({mode}) | workers de hash: {workers} | total: {total:.2f} s')
+    print(f'latência p50 {statistics.median(lat):.1f} ms | p95 {p95:.1f} ms | máx {lat[-1]:.1f} ms')
+    print('status:', dict(sorted(statuses.items())))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark do índice de confrontos: popula MatchResult com N jogos sintéticos
+(duas linhas por jogo) e mede as consultas "A x B" e "últimos N".
+
+Uso:
+    python bench_player_index.py [total_de_jogos]   (padrão: 1.000.000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app import create_app, init_db
+from models import db, User, Tournament, PlayerIdentity, MatchResult
+from player_index import head_to_head, last_results
+
+N_IDENTITIES = 2000
+BATCH_SIZE = 20000
+QUERIES = 1000
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tmpdir = tempfile.mkdtemp()
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmpdir, 'bench.db')})
+    init_db(app)
+    rnd = random.Random(42)
+
+    with app.app_context():
+        user = User(name='Bench', email='bench@example.com', password_hash='-')
+        db.session.add(user)
+        db.session.flush()
+        t = Tournament(user_id=user.id, name='Bench', size=16)
+        db.session.add(t)
+        db.session.flush()
+        db.session.execute(PlayerIdentity.__table__.insert(), [
+            {'id': i, 'user_id': user.id, 'name': f'Jogador {i}', 'normalized_name': f'jogador {i}'}
+            for i in range(1, N_IDENTITIES + 1)
+        ])
+
+        # match_id sintético (sem linhas em Match; FKs não são checadas no SQLite)
+        start = datetime(2020, 1, 1)
+        t0 = time.perf_counter()
+        batch = []
+        for match_id in range(1, total + 1):
+            a, b = rnd.sample(range(1, N_IDENTITIES + 1), 2)
+            played_at = start + timedelta(minutes=match_id)
+            for me, other, won in ((a, b, True), (b, a, False)):
+                batch.append({'match_id': match_id, 'tournament_id': t.id, 'identity_id': me,
+                              'opponent_identity_id': other, 'won': won, 'score': '6-4 6-4',
+                              'played_at': played_at})
+            if len(batch) >= BATCH_SIZE:
+                db.session.execute(MatchResult.__table__.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(MatchResult.__table__.insert(), batch)
+        db.session.commit()
+        t1 = time.perf_counter()
+
+        pairs = [rnd.sample(range(1, N_IDENTITIES + 1), 2) for _ in range(QUERIES)]
+        t2 = time.perf_counter()
+        for a, b in pairs:
+            head_to_head(a, b)
+        t3 = time.perf_counter()
+        for a, _ in pairs:
+            last_results(a, 10)
+        t4 = time.perf_counter()
+
+    print(f'jogos: {total} | linhas de índice: {2 * total} | carga: {t1 - t0:.2f} s')
+    print(f'A x B: {(t3 - t2) / QUERIES * 1000:.3f} ms/consulta | '
+          f'últimos 10: {(t4 - t3) / QUERIES * 1000:.3f} ms/consulta')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark de ida e volta do snapshot: gera um snapshot sintético, importa em
+um banco SQLite temporário com inserts em lote, reconstrói o índice de
+confrontos (como o comando import-snapshot) e exporta de novo.
+
+Uso:
+    python bench_snapshot.py [total_de_jogos]   (padrão: 1.000.000)
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from app import create_app, init_db
+from models import db, User
+from player_index import reindex_all
+from snapshot import SNAPSHOT_FORMAT, SNAPSHOT_VERSION, dump_snapshot, load_snapshot
+
+def write_synthetic_snapshot(path, total_matches, size=16):
+    """Torneios de 'size' jogadores (size - 1 jogos cada) até atingir total_matches."""
+    matches_per_t = size - 1
+    n_tournaments = max(1, total_matches // matches_per_t)
+    pid = mid = 0
+    with open(path, 'w', encoding='utf-8') as fp:
+        fp.write(json.dumps({'type': 'header', 'format': SNAPSHOT_FORMAT, 'version': SNAPSHOT_VERSION}) + '\n')
+        for tid in range(1, n_tournaments + 1):
+            fp.write(json.dumps({'type': 'tournament', 'id': tid, 'name': f'Torneio {tid}', 'stage': None,
+                                 'size': size, 'is_random': True, 'created_at': None}) + '\n')
+            first_pid = pid + 1
+            for i in range(size):
+                pid += 1
+                fp.write(json.dumps({'type': 'player', 'id': pid, 'tournament_id': tid,
+                                     'name': f'Jogador {i + 1}'}) + '\n')
+            # Jogos por rodada; o jogo k da rodada r alimenta o jogo k//2 da rodada r+1
+            round_ids = []
+            per_round = size // 2
+            while per_round >= 1:
+                round_ids.append(list(range(mid + 1, mid + per_round + 1)))
+                mid += per_round
+                per_round //= 2
+            for r, ids in enumerate(round_ids, start=1):
+                nxt = round_ids[r] if r < len(round_ids) else None
+                for k, match_id in enumerate(ids):
+                    p1 = first_pid + 2 * k if r == 1 else None
+                    p2 = first_pid + 2 * k + 1 if r == 1 else None
+                    fp.write(json.dumps({
+                        'type': 'match', 'id': match_id, 'tournament_id': tid,
+                        'round_number': r, 'position_in_round': k + 1,
+                        'player1_id': p1, 'player2_id': p2,
+                        'player1_placeholder': None, 'player2_placeholder': None,
+                        'winner_player_id': p1, 'winner_name': None,
+                        'score': '6-4 6-4' if r == 1 else None, 'date_time': None,
+                        'next_match_id': nxt[k // 2] if nxt else None,
+                        'next_match_slot': (k % 2) + 1 if nxt else None,
+                    }) + '\n')
+    return n_tournaments * matches_per_t
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tmpdir = tempfile.mkdtemp()
+    src = os.path.join(tmpdir, 'in.ndjson')
+    out = os.path.join(tmpdir, 'out.ndjson')
+
+    n = write_synthetic_snapshot(src, total)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmpdir, 'bench.db')})
+    init_db(app)
+    with app.app_context():
+        user = User(name='Bench', email='bench@example.com', password_hash='-')
+        db.session.add(user)
+        db.session.commit()
+
+        t0 = time.perf_counter()
+        with open(src, encoding='utf-8') as fp:
+            tournament_ids = load_snapshot(fp, user.id)
+        t1 = time.perf_counter()
+        reindex_all(db, tournament_ids)
+        t_index = time.perf_counter() - t1
+        t1 = time.perf_counter()
+        with open(out, 'w', encoding='utf-8') as fp:
+            dump_snapshot(fp, user_id=user.id)
+        t2 = time.perf_counter()
+
+    print(f'jogos: {n} | torneios: {len(tournament_ids)}')
+    print(f'importação: {t1 - t0 - t_index:.2f} s | índice: {t_index:.2f} s | '
+          f'exportação: {t2 - t1:.2f} s | total: {t2 - t0:.2f} s')
+
+if __name__ == '__main__':
+    main()
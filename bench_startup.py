@@ -0,0 +1,59 @@
+"""
+Benchmark de cold start: tempo de import do app, create_app e primeira requisição.
+
+Uso:
+    python bench_startup.py [repeticoes]
+
+Cada repetição roda em um interpretador novo para medir o boot real de um worker.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+# Executado em um processo Python limpo
+_PROBE = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+app = app_module.create_app({'TESTING': True, 'WTF_CSRF_ENABLED': False,
+                             'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+t2 = time.perf_counter()
+app_module.init_db(app)
+t3 = time.perf_counter()
+client = app.test_client()
+resp = client.get('/login')
+t4 = time.perf_counter()
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000,
+    'create_app_ms': (t2 - t1) * 1000,
+    'first_request_ms': (t4 - t3) * 1000,
+    'boot_to_first_request_ms': ((t2 - t0) + (t4 - t3)) * 1000,
+    'status': resp.status_code,
+    'pillow_loaded': 'PIL' in sys.modules,
+}))
+"""
+
+def run_once():
+    out = subprocess.run(
+        [sys.executable, '-c', _PROBE],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    runs = [run_once() for _ in range(repeats)]
+
+    for key in ('import_ms', 'create_app_ms', 'first_request_ms', 'boot_to_first_request_ms'):
+        values = [r[key] for r in runs]
+        print(f'{key:>26}: mediana {statistics.median(values):8.2f} ms | '
+              f'min {min(values):8.2f} ms | max {max(values):8.2f} ms')
+    print(f"{'pillow_loaded':>26}: {any(r['pillow_loaded'] for r in runs)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""
+Cache de leitura do estado serializado das chaves (torneio + jogadores + jogos).
+
+Dois níveis:
+- LRU em memória, por processo;
+- nível compartilhado entre workers (FileStore em disco, MemoryStore ou um
+  cliente compatível com Redis: qualquer objeto com get/set/delete).
+
+As entradas são chaveadas por (tournament_id, versão) e a versão vive sempre
+no nível compartilhado. Cada escrita chama invalidate(), que troca a versão
+do torneio: entradas antigas deixam de ser alcançáveis em todos os workers,
+sem precisar varrer o LRU de cada um. Sem nível compartilhado o cache fica
+desligado (nenhum worker conseguiria ver as invalidações dos outros).
+"""
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from types import SimpleNamespace
+
+FORMAT_VERSION = 1
+
+def serialize_tournament(t):
+    """Converte um Tournament (ORM) em bytes JSON compactos."""
+    data = {
+        'v': FORMAT_VERSION,
+        'id': t.id,
+        'user_id': t.user_id,
+        'name': t.name,
+        'stage': t.stage,
+        'size': t.size,
+        'is_random': t.is_random,
+        'created_at': t.created_at.isoformat() if t.created_at else None,
+        'players': [{'id': p.id, 'name': p.name} for p in t.players],
+        'matches': [
+            {
+                'id': m.id,
+                'round_number': m.round_number,
+                'position_in_round': m.position_in_round,
+                'player1_id': m.player1_id,
+                'player2_id': m.player2_id,
+                'player1_placeholder': m.player1_placeholder,
+                'player2_placeholder': m.player2_placeholder,
+                'winner_player_id': m.winner_player_id,
+                'winner_name': m.winner_name,
+                'score': m.score,
+                'date_time': m.date_time.isoformat() if m.date_time else None,
+                'next_match_id': m.next_match_id,
+                'next_match_slot': m.next_match_slot,
+            }
+            for m in t.matches
+        ],
+    }
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+def deserialize_tournament(raw):
+    """
+    Reconstrói o estado como objetos somente-leitura com os mesmos atributos
+    usados pelos templates e por render_bracket_image.
+    """
+    data = json.loads(raw)
+    if data.get('v') != FORMAT_VERSION:
+        return None
+    players = [SimpleNamespace(**p) for p in data['players']]
+    matches = []
+    for m in data['matches']:
+        m = dict(m)
+        m['date_time'] = datetime.fromisoformat(m['date_time']) if m['date_time'] else None
+        matches.append(SimpleNamespace(**m))
+    created_at = datetime.fromisoformat(data['created_at']) if data['created_at'] else None
+    return SimpleNamespace(
+        id=data['id'], user_id=data['user_id'], name=data['name'], stage=data['stage'],
+        size=data['size'], is_random=data['is_random'], created_at=created_at,
+        players=players, matches=matches,
+    )
+
+class LRUCache:
+    """LRU simples e thread-safe (nível em processo)."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class MemoryStore:
+    """
+    Nível compartilhado em memória, com a mesma interface de um cliente Redis
+    (get/set/delete com bytes). Útil como substituto local em testes.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key, value):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        with self._lock:
+            self._data[key] = value
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for k in keys if self._data.pop(k, None) is not None)
+
+class FileStore:
+    """
+    Nível compartilhado em disco: um arquivo por chave em um diretório comum
+    aos workers. Gravações usam arquivo temporário + os.replace (atômico).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key.replace(':', '_'))
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        path = self._path(key)
+        tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(value)
+        os.replace(tmp, path)
+        return True
+
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+class BracketCache:
+    """
+    Cache read-through do estado das chaves.
+
+    get(tournament_id, loader): loader() devolve o Tournament do ORM (ou None);
+    o resultado é serializado, guardado nos dois níveis e devolvido já
+    desserializado. invalidate(tournament_id) deve ser chamado após cada commit
+    que altere o torneio. Com shared=None, get() apenas repassa o loader().
+    """
+
+    def __init__(self, maxsize=128, shared=None):
+        self.local = LRUCache(maxsize)
+        self.shared = shared
+
+    @property
+    def enabled(self):
+        return self.shared is not None
+
+    @staticmethod
+    def _version_key(tournament_id):
+        return f'bracket:{tournament_id}:version'
+
+    @staticmethod
+    def _state_key(tournament_id, version):
+        return f'bracket:{tournament_id}:{version}'
+
+    def version(self, tournament_id):
+        raw = self.shared.get(self._version_key(tournament_id))
+        return raw.decode('utf-8') if raw else '0'
+
+    def get(self, tournament_id, loader):
+        if not self.enabled:
+            return loader()
+
+        version = self.version(tournament_id)
+        key = (tournament_id, version)
+
+        state = self.local.get(key)
+        if state is not None:
+            return state
+
+        raw = self.shared.get(self._state_key(tournament_id, version))
+        if raw:
+            state = deserialize_tournament(raw)
+            if state is not None:
+                self.local.set(key, state)
+                return state
+
+        t = loader()
+        if t is None:
+            return None
+        raw = serialize_tournament(t)
+        self.shared.set(self._state_key(tournament_id, version), raw)
+        state = deserialize_tournament(raw)
+        self.local.set(key, state)
+        return state
+
+    def invalidate(self, tournament_id):
+        if not self.enabled:
+            return
+        old_version = self.version(tournament_id)
+        self.shared.set(self._version_key(tournament_id), uuid.uuid4().hex)
+        self.shared.delete(self._state_key(tournament_id, old_version))
+
+def create_bracket_cache(config):
+    """
+    Monta o cache a partir da config do Flask (a primeira opção presente vence):
+    - BRACKET_CACHE_STORE: objeto get/set/delete já pronto (ex.: MemoryStore em testes);
+    - BRACKET_CACHE_REDIS_URL: usa Redis como nível compartilhado (requer o pacote redis);
+    - BRACKET_CACHE_DIR: usa FileStore nesse diretório como nível compartilhado;
+    - BRACKET_CACHE_SIZE: entradas no LRU local (padrão 128).
+    Sem nenhum nível compartilhado, o cache fica desligado.
+    """
+    shared = config.get('BRACKET_CACHE_STORE')
+    if shared is None and config.get('BRACKET_CACHE_REDIS_URL'):
+        import redis  # dependência opcional
+        shared = redis.Redis.from_url(config['BRACKET_CACHE_REDIS_URL'])
+    elif shared is None and config.get('BRACKET_CACHE_DIR'):
+        shared = FileStore(config['BRACKET_CACHE_DIR'])
+    return BracketCache(maxsize=config.get('BRACKET_CACHE_SIZE', 128), shared=shared)
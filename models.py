@@ -25,12 +25,22 @@ class Tournament(db.Model):
 
 class Player(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False, index=True)
     name = db.Column(db.String(120), nullable=False)
+    identity_id = db.Column(db.Integer, db.ForeignKey('player_identity.id'), nullable=True, index=True)
+
+class PlayerIdentity(db.Model):
+    """Mesma pessoa ao longo de vários torneios do organizador (resolvida pelo nome normalizado)."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    name = db.Column(db.String(120), nullable=False)
+    normalized_name = db.Column(db.String(120), nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'normalized_name'),)
 
 class Match(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False, index=True)
     round_number = db.Column(db.Integer, nullable=False)  # 1 = Quartas/Primeira fase, etc
     position_in_round = db.Column(db.Integer, nullable=False)  # index do duelo nesse round
     player1_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=True)
@@ -41,8 +51,28 @@ class Match(db.Model):
     winner_name = db.Column(db.String(120), nullable=True)
     score = db.Column(db.String(120), nullable=True)  # "6-4 4-6 7-5"
     date_time = db.Column(db.DateTime, nullable=True)
+    decided_at = db.Column(db.DateTime, nullable=True)  # quando o vencedor foi definido
 
     next_match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=True)
     next_match_slot = db.Column(db.Integer, nullable=True)  # 1 ou 2
 
-    # referência reversa manual (não ORM) para next_match é resolvida via query
\ No newline at end of file
+    # referência reversa manual (não ORM) para next_match é resolvida via query
+
+class MatchResult(db.Model):
+    """
+    Índice de resultados: uma linha por jogador por jogo decidido, mantida a cada
+    edit_match. Os índices compostos atendem "A x B" e "últimos N" em O(log n).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=False, index=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False, index=True)
+    identity_id = db.Column(db.Integer, db.ForeignKey('player_identity.id'), nullable=False)
+    opponent_identity_id = db.Column(db.Integer, db.ForeignKey('player_identity.id'), nullable=False)
+    won = db.Column(db.Boolean, nullable=False)
+    score = db.Column(db.String(120), nullable=True)
+    played_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_result_h2h', 'identity_id', 'opponent_identity_id', 'played_at'),
+        db.Index('ix_result_recent', 'identity_id', 'played_at'),
+    )
@@ -0,0 +1,212 @@
+"""
+Identidade global de jogadores e índice de confrontos/resultados.
+
+- resolve_identity: liga um Player (por torneio) a uma PlayerIdentity do
+  organizador, pelo nome normalizado (sem acentos, caixa e espaços extras).
+- record_match_result: atualiza as linhas de MatchResult de um jogo; chamado
+  a cada edit_match salvo.
+- reindex_all: backfill em lote, sem ORM por jogo (executemany + INSERT ... SELECT).
+- head_to_head / last_results: consultas servidas pelos índices compostos.
+"""
+import unicodedata
+from datetime import datetime
+
+from sqlalchemy import and_, bindparam, delete, func, insert, select, union_all, update
+
+from models import Tournament, Player, Match, PlayerIdentity, MatchResult
+
+def normalize_name(name):
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    return ' '.join(name.casefold().split())[:120]
+
+def resolve_identity(db, player, user_id, cache=None):
+    """
+    Define player.identity_id (cria a identidade se preciso). BYE e nomes vazios
+    ficam sem identidade. 'cache' (dict opcional) evita consultas repetidas em lote.
+    """
+    db.session.add(player)
+    key = normalize_name(player.name)
+    if not key or key == 'bye':
+        player.identity_id = None
+        return None
+
+    identity = cache.get((user_id, key)) if cache is not None else None
+    if identity is None:
+        identity = PlayerIdentity.query.filter_by(user_id=user_id, normalized_name=key).first()
+        if identity is None:
+            identity = PlayerIdentity(user_id=user_id, name=player.name.strip(), normalized_name=key)
+            db.session.add(identity)
+            db.session.flush()
+        if cache is not None:
+            cache[(user_id, key)] = identity
+
+    player.identity_id = identity.id
+    return identity
+
+def record_match_result(db, match):
+    """
+    Regrava as linhas de MatchResult do jogo: duas linhas (uma por lado) se houver
+    vencedor entre dois jogadores com identidade; nenhuma caso contrário.
+    played_at é o horário do jogo ou, sem horário, match.decided_at, definido
+    uma única vez quando o vencedor aparece: regravar não move o resultado.
+    """
+    if not match.winner_player_id:
+        match.decided_at = None
+    elif match.decided_at is None:
+        # Jogos indexados antes de decided_at existir mantêm o played_at já gravado
+        previous = None
+        if match.date_time is None:
+            previous = db.session.query(MatchResult.played_at).filter_by(match_id=match.id).limit(1).scalar()
+        match.decided_at = previous or datetime.utcnow()
+
+    MatchResult.query.filter_by(match_id=match.id).delete(synchronize_session=False)
+
+    if not (match.player1_id and match.player2_id and match.winner_player_id):
+        return
+    p1 = Player.query.get(match.player1_id)
+    p2 = Player.query.get(match.player2_id)
+    if not (p1 and p2 and p1.identity_id and p2.identity_id):
+        return
+
+    played_at = match.date_time or match.decided_at
+    for me, other in ((p1, p2), (p2, p1)):
+        db.session.add(MatchResult(
+            match_id=match.id,
+            tournament_id=match.tournament_id,
+            identity_id=me.identity_id,
+            opponent_identity_id=other.identity_id,
+            won=(match.winner_player_id == me.id),
+            score=match.score,
+            played_at=played_at,
+        ))
+    db.session.flush()
+
+def index_tournament(db, tournament, cache=None):
+    """Resolve as identidades dos jogadores e reconstrói o índice de todos os jogos do torneio."""
+    for p in tournament.players:
+        resolve_identity(db, p, tournament.user_id, cache)
+    db.session.flush()
+    for m in tournament.matches:
+        record_match_result(db, m)
+
+def reindex_all(db, tournament_ids=None, batch_size=500):
+    """
+    Backfill em lote (flask resolve-players / após importar snapshot). Sem ORM
+    por jogo: os nomes são normalizados em Python e os vínculos gravados com
+    executemany; as linhas de MatchResult saem de um INSERT ... SELECT por lote
+    de torneios, com a mesma regra de record_match_result.
+    """
+    if tournament_ids is None:
+        tournament_ids = [tid for (tid,) in db.session.query(Tournament.id).order_by(Tournament.id)]
+    tournament_ids = list(tournament_ids)
+    identities = {}  # (user_id, nome normalizado) -> id; limitado ao nº de identidades
+    loaded_users = set()
+    now = datetime.utcnow()
+    for start in range(0, len(tournament_ids), batch_size):
+        chunk = tournament_ids[start:start + batch_size]
+        _bulk_resolve_identities(db, chunk, identities, loaded_users)
+        _bulk_record_results(db, chunk, now)
+        db.session.commit()
+    return len(tournament_ids)
+
+def _executemany(db, stmt, rows):
+    """executemany direto no DBAPI, dentro da transação da sessão (rows: dicts)."""
+    conn = db.session.connection()
+    compiled = stmt.compile(dialect=conn.dialect)
+    if conn.dialect.positional:
+        keys = compiled.positiontup
+        rows = [tuple(row[k] for k in keys) for row in rows]
+    conn.connection.cursor().executemany(str(compiled), rows)
+
+def _bulk_resolve_identities(db, tournament_ids, identities, loaded_users):
+    rows = db.session.execute(
+        select(Player.id, Player.name, Player.identity_id, Tournament.user_id)
+        .join(Tournament, Tournament.id == Player.tournament_id)
+        .where(Player.tournament_id.in_(tournament_ids))
+    ).all()
+
+    for user_id in {r.user_id for r in rows} - loaded_users:
+        for iid, key in db.session.execute(
+            select(PlayerIdentity.id, PlayerIdentity.normalized_name).where(PlayerIdentity.user_id == user_id)
+        ):
+            identities[(user_id, key)] = iid
+        loaded_users.add(user_id)
+
+    keyed = []
+    missing = {}
+    normalized = {}  # nomes se repetem muito entre torneios do mesmo organizador
+    for r in rows:
+        key = normalized.get(r.name)
+        if key is None:
+            key = normalized[r.name] = normalize_name(r.name)
+        if not key or key == 'bye':
+            keyed.append((r, None))
+            continue
+        keyed.append((r, (r.user_id, key)))
+        if (r.user_id, key) not in identities:
+            missing.setdefault((r.user_id, key), r.name.strip())
+
+    if missing:
+        last_id = db.session.execute(select(func.max(PlayerIdentity.id))).scalar() or 0
+        db.session.execute(insert(PlayerIdentity.__table__), [
+            {'user_id': user_id, 'normalized_name': key, 'name': name}
+            for (user_id, key), name in missing.items()
+        ])
+        for iid, user_id, key in db.session.execute(
+            select(PlayerIdentity.id, PlayerIdentity.user_id, PlayerIdentity.normalized_name)
+            .where(PlayerIdentity.id > last_id)
+        ):
+            identities[(user_id, key)] = iid
+
+    changes = []
+    for r, ident in keyed:
+        iid = identities[ident] if ident else None
+        if iid != r.identity_id:
+            changes.append({'pid': r.id, 'iid': iid})
+    if changes:
+        p = Player.__table__
+        _executemany(db, update(p).where(p.c.id == bindparam('pid')).values(identity_id=bindparam('iid')), changes)
+
+def _bulk_record_results(db, tournament_ids, now):
+    m = Match.__table__
+    r = MatchResult.__table__
+    in_chunk = m.c.tournament_id.in_(tournament_ids)
+    db.session.execute(update(m).where(in_chunk, m.c.winner_player_id.is_(None), m.c.decided_at.isnot(None))
+                       .values(decided_at=None))
+    undecided = and_(in_chunk, m.c.winner_player_id.isnot(None), m.c.decided_at.is_(None))
+    previous = select(func.min(r.c.played_at)).where(r.c.match_id == m.c.id).scalar_subquery()
+    db.session.execute(update(m).where(undecided, m.c.date_time.is_(None)).values(decided_at=previous))
+    db.session.execute(update(m).where(undecided).values(decided_at=now))
+    db.session.execute(delete(r).where(r.c.tournament_id.in_(tournament_ids)))
+
+    p1 = Player.__table__.alias('p1')
+    p2 = Player.__table__.alias('p2')
+    joined = m.join(p1, p1.c.id == m.c.player1_id).join(p2, p2.c.id == m.c.player2_id)
+    decided = and_(in_chunk, m.c.winner_player_id.isnot(None),
+                   p1.c.identity_id.isnot(None), p2.c.identity_id.isnot(None))
+
+    def side(me, other):
+        return select(
+            m.c.id, m.c.tournament_id, me.c.identity_id, other.c.identity_id,
+            m.c.winner_player_id == me.c.id, m.c.score, func.coalesce(m.c.date_time, m.c.decided_at),
+        ).select_from(joined).where(decided)
+
+    db.session.execute(insert(r).from_select(
+        ['match_id', 'tournament_id', 'identity_id', 'opponent_identity_id', 'won', 'score', 'played_at'],
+        union_all(side(p1, p2), side(p2, p1)),
+    ))
+
+def head_to_head(identity_a, identity_b, limit=None):
+    """Histórico de A contra B, do mais recente ao mais antigo (linhas do ponto de vista de A)."""
+    query = MatchResult.query.filter_by(identity_id=identity_a, opponent_identity_id=identity_b)\
+                             .order_by(MatchResult.played_at.desc(), MatchResult.match_id.desc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+def last_results(identity_id, n=10):
+    """Últimos N resultados do jogador em qualquer torneio."""
+    return MatchResult.query.filter_by(identity_id=identity_id)\
+                            .order_by(MatchResult.played_at.desc(), MatchResult.match_id.desc())\
+                            .limit(n).all()
@@ -0,0 +1,443 @@
+"""
+Snapshot/restore de torneios em JSON delimitado por linha (NDJSON).
+
+Formato (uma linha = um registro):
+    {"type": "header", "format": "match_organizer.snapshot", "version": 1}
+    {"type": "tournament", "id": ..., "name": ..., ...}
+    {"type": "player", "id": ..., "tournament_id": ..., "name": ...}
+    {"type": "match", "id": ..., "tournament_id": ..., "next_match_id": ..., ...}
+
+Todos os torneios vêm antes dos jogadores e todos os jogadores antes dos jogos.
+
+A exportação lê o banco em streaming (memória constante). A importação remapeia
+os ids somando um deslocamento por tabela (maior id existente), o que preserva
+os vínculos next_match_id e os ids de jogadores sem dicionários de mapeamento.
+
+No SQLite o JSON é montado e lido pelo próprio banco (json_object/json_extract):
+a exportação só copia texto, e a importação grava as linhas cruas em tabelas
+temporárias e insere tudo com INSERT ... SELECT. Outros bancos usam o caminho em
+Python (encoder reutilizado + executemany direto no driver).
+
+Os dois caminhos aplicam as mesmas regras (_check_record: campos obrigatórios,
+ids inteiros, datas ISO 8601) e, antes do commit, conferem que toda referência
+aponta para um registro importado do mesmo torneio. Qualquer violação vira
+SnapshotError e nada é gravado.
+"""
+import gzip
+import json
+import sqlite3
+from datetime import datetime
+
+from sqlalchemy import func, or_, select, text
+
+from models import db, Tournament, Player, Match
+
+SNAPSHOT_FORMAT = 'match_organizer.snapshot'
+SNAPSHOT_VERSION = 1
+BATCH_SIZE = 10000
+
+TOURNAMENT_FIELDS = ('id', 'name', 'stage', 'size', 'is_random', 'created_at')
+PLAYER_FIELDS = ('id', 'tournament_id', 'name')
+MATCH_FIELDS = (
+    'id', 'tournament_id', 'round_number', 'position_in_round',
+    'player1_id', 'player2_id', 'player1_placeholder', 'player2_placeholder',
+    'winner_player_id', 'winner_name', 'score', 'date_time',
+    'next_match_id', 'next_match_slot', 'decided_at',
+)
+BOOLEAN_FIELDS = ('is_random',)
+DATETIME_FIELDS = ('created_at', 'date_time', 'decided_at')
+PLAYER_REF_FIELDS = ('player1_id', 'player2_id', 'winner_player_id')
+ID_FIELDS = ('id', 'tournament_id')  # inteiros >= 1
+REF_FIELDS = PLAYER_REF_FIELDS + ('next_match_id',)  # inteiros >= 0 (0 = sem vínculo)
+FIELDS = {'tournament': TOURNAMENT_FIELDS, 'player': PLAYER_FIELDS, 'match': MATCH_FIELDS}
+REQUIRED_FIELDS = {
+    'tournament': ('id', 'name', 'size'),
+    'player': ('id', 'tournament_id', 'name'),
+    'match': ('id', 'tournament_id', 'round_number', 'position_in_round'),
+}
+
+class SnapshotError(ValueError):
+    pass
+
+def open_snapshot(path, mode):
+    """Abre o arquivo de snapshot; '.gz' é comprimido/descomprimido automaticamente."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def _json_default(o):
+    if isinstance(o, datetime):
+        return o.isoformat()
+    raise TypeError(f'Tipo não serializável: {type(o).__name__}')
+
+# Um único encoder (C) reutilizado: json.dumps com separators cria um por chamada
+_encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False, default=_json_default).encode
+
+def _is_sqlite():
+    return db.session.connection().dialect.name == 'sqlite'
+
+def _sections(tournament_ids, user_id):
+    """(tipo, tabela, critério, campos) na ordem do arquivo."""
+    t_table = Tournament.__table__
+    p_table = Player.__table__
+    m_table = Match.__table__
+    if user_id is not None:
+        t_criteria = t_table.c.user_id == user_id
+    else:
+        t_criteria = t_table.c.id.in_(tournament_ids)
+    t_ids = select(t_table.c.id).where(t_criteria)
+    return (
+        ('tournament', t_table, t_criteria, TOURNAMENT_FIELDS),
+        ('player', p_table, p_table.c.tournament_id.in_(t_ids), PLAYER_FIELDS),
+        ('match', m_table, m_table.c.tournament_id.in_(t_ids), MATCH_FIELDS),
+    )
+
+def _sqlite_json_value(table, field):
+    col = table.c[field]
+    if field in BOOLEAN_FIELDS:
+        return func.json(text(
+            f"CASE WHEN {table.name}.{field} IS NULL THEN 'null' "
+            f"WHEN {table.name}.{field} THEN 'true' ELSE 'false' END"
+        ))
+    if field in DATETIME_FIELDS:
+        # Armazenado como 'AAAA-MM-DD HH:MM:SS.ffffff'; o snapshot usa ISO com 'T'
+        return func.replace(col, ' ', 'T')
+    return col
+
+def dump_snapshot(fp, tournament_ids=None, user_id=None):
+    """
+    Escreve o snapshot em fp. Exporta os torneios indicados em tournament_ids
+    ou todo o histórico do usuário user_id. Retorna a quantidade de registros.
+    """
+    if tournament_ids is None and user_id is None:
+        raise SnapshotError('Informe tournament_ids ou user_id.')
+
+    fp.write(_encode({'type': 'header', 'format': SNAPSHOT_FORMAT, 'version': SNAPSHOT_VERSION}))
+    fp.write('\n')
+    sqlite = _is_sqlite()
+    count = 0
+    for kind, table, criteria, fields in _sections(tournament_ids, user_id):
+        if sqlite:
+            # O SQLite monta cada linha (json_object); lida pelo cursor do driver, sem objetos Row
+            args = ['type', kind]
+            for f in fields:
+                args += [f, _sqlite_json_value(table, f)]
+            stmt = select(func.json_object(*args)).where(criteria).order_by(table.c.id)
+            for rows in _sqlite_fetch(stmt):
+                fp.write('\n'.join([row[0] for row in rows]))
+                fp.write('\n')
+                count += len(rows)
+        else:
+            keys = ('type',) + fields
+            stmt = select(*[table.c[f] for f in fields]).where(criteria).order_by(table.c.id)\
+                .execution_options(stream_results=True)
+            for rows in db.session.execute(stmt).partitions(BATCH_SIZE):
+                fp.write(''.join([_encode(dict(zip(keys, (kind, *row)))) + '\n' for row in rows]))
+                count += len(rows)
+    return count
+
+def _sqlite_fetch(stmt):
+    conn = db.session.connection()
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={'render_postcompile': True})
+    cursor = conn.connection.cursor()
+    cursor.execute(str(compiled), [compiled.params[k] for k in compiled.positiontup])
+    while True:
+        rows = cursor.fetchmany(BATCH_SIZE)
+        if not rows:
+            return
+        yield rows
+
+def _db_datetime(value):
+    """Texto ISO 8601 do snapshot -> texto aceito pela coluna DateTime ('AAAA-MM-DD HH:MM:SS')."""
+    value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        raise ValueError('Data/hora com fuso horário.')
+    return value.isoformat(' ')
+
+def _sqlite_datetime(value):
+    """_db_datetime como função SQL: NULL quando o texto não é uma data válida."""
+    try:
+        return _db_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+def _check_record(kind, rec, lineno):
+    """Regras de conteúdo de um registro; as mesmas do filtro SQL em _sqlite_check."""
+    for f in REQUIRED_FIELDS[kind]:
+        if rec.get(f) is None:
+            raise SnapshotError(f'Linha {lineno}: campo obrigatório ausente: {f}')
+    for f in FIELDS[kind]:
+        value = rec.get(f)
+        if value is None:
+            continue
+        if f in ID_FIELDS or f in REF_FIELDS:
+            if type(value) is not int or value < (1 if f in ID_FIELDS else 0):
+                raise SnapshotError(f'Linha {lineno}: {f} inválido: {value!r}')
+        elif f in DATETIME_FIELDS:
+            try:
+                _db_datetime(value)
+            except (TypeError, ValueError):
+                raise SnapshotError(f'Linha {lineno}: data/hora inválida em {f}: {value!r}')
+
+def _check_references(offsets):
+    """
+    Depois dos inserts e antes do commit: jogadores e jogos importados precisam
+    apontar para torneios, jogadores e jogos do próprio snapshot, no mesmo torneio.
+    Como os ids novos ficam acima dos deslocamentos, basta o vínculo existir.
+    """
+    t = Tournament.__table__
+    p = Player.__table__
+    m = Match.__table__
+    checks = [
+        ('player', p, p.c.tournament_id, t, None),
+        ('match', m, m.c.tournament_id, t, None),
+    ]
+    for field in PLAYER_REF_FIELDS:
+        checks.append(('match', m, m.c[field], p, 'player'))
+    checks.append(('match', m, m.c.next_match_id, m, 'match'))
+
+    for kind, table, ref, target, target_kind in checks:
+        target = target.alias('target')
+        broken = target.c.id.is_(None)
+        if target_kind is not None:
+            broken = or_(broken, target.c.tournament_id != table.c.tournament_id)
+        row = db.session.execute(
+            select(table.c.id, ref)
+            .select_from(table.outerjoin(target, target.c.id == ref))
+            .where(table.c.id > offsets[kind], ref.isnot(None), broken)
+            .order_by(table.c.id).limit(1)
+        ).first()
+        if row is not None:
+            ref_offset = offsets[target_kind or 'tournament']
+            raise SnapshotError(
+                f'Registro {kind} id={row[0] - offsets[kind]}: {ref.name}={row[1] - ref_offset} '
+                'não aponta para um registro do mesmo torneio no snapshot.'
+            )
+
+def _max_id(model):
+    return db.session.execute(select(func.max(model.id))).scalar() or 0
+
+def load_snapshot(fp, user_id, commit=True):
+    """
+    Importa um snapshot para o usuário user_id usando inserts em lote.
+    Retorna a lista dos novos ids de torneio.
+    """
+    header = fp.readline()
+    try:
+        header = json.loads(header)
+    except ValueError:
+        raise SnapshotError('Snapshot sem cabeçalho válido.')
+    if header.get('type') != 'header' or header.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError('Arquivo não é um snapshot de torneios.')
+    if header.get('version') != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Versão de snapshot não suportada: {header.get('version')}")
+
+    offsets = {
+        'tournament': _max_id(Tournament),
+        'player': _max_id(Player),
+        'match': _max_id(Match),
+    }
+    if _is_sqlite():
+        new_tournament_ids = _load_sqlite(fp, user_id, offsets)
+    else:
+        new_tournament_ids = _load_generic(fp, user_id, offsets)
+    _check_references(offsets)
+    if commit:
+        db.session.commit()
+    return new_tournament_ids
+
+def _sqlite_extract(field, kind, offsets):
+    expr = f"json_extract(line, '$.{field}')"
+    if field == 'id':
+        return f'{expr} + {int(offsets[kind])}'
+    if field == 'tournament_id':
+        return f"{expr} + {int(offsets['tournament'])}"
+    if field in PLAYER_REF_FIELDS:
+        return f"NULLIF({expr}, 0) + {int(offsets['player'])}"
+    if field == 'next_match_id':
+        return f"NULLIF({expr}, 0) + {int(offsets['match'])}"
+    if field in DATETIME_FIELDS:
+        return f'CASE WHEN {expr} IS NULL THEN NULL ELSE snapshot_datetime({expr}) END'
+    return expr
+
+def _sqlite_check(cursor, kind):
+    """Procura em SQL a primeira linha que _check_record rejeitaria e levanta o erro dela."""
+    fields = FIELDS[kind]
+    conditions = [f"json_extract(line, '$.{f}') IS NULL" for f in REQUIRED_FIELDS[kind]]
+    for f in fields:
+        expr = f"json_extract(line, '$.{f}')"
+        if f in ID_FIELDS or f in REF_FIELDS:
+            conditions.append(f"coalesce(json_type(line, '$.{f}'), 'null') NOT IN ('integer', 'null')")
+            conditions.append(f'{expr} < {1 if f in ID_FIELDS else 0}')
+        elif f in DATETIME_FIELDS:
+            conditions.append(f'({expr} IS NOT NULL AND snapshot_datetime({expr}) IS NULL)')
+    try:
+        bad = cursor.execute(
+            f'SELECT lineno, line FROM temp.snapshot_{kind} WHERE {" OR ".join(conditions)} '
+            'ORDER BY lineno LIMIT 1'
+        ).fetchone()
+    except sqlite3.OperationalError:
+        bad = cursor.execute(
+            f'SELECT lineno FROM temp.snapshot_{kind} WHERE NOT json_valid(line) ORDER BY lineno LIMIT 1'
+        ).fetchone()
+        if bad:
+            raise SnapshotError(f'Linha {bad[0]} inválida.')
+        raise
+    if bad:
+        lineno, line = bad
+        _check_record(kind, json.loads(line), lineno)
+        raise SnapshotError(f'Linha {lineno} inválida.')
+
+def _load_sqlite(fp, user_id, offsets):
+    """
+    Linhas cruas -> uma tabela temporária por tipo -> INSERT ... SELECT com
+    json_extract. O SQLite faz o parse; o Python só separa as linhas por tipo.
+    """
+    dbapi_conn = db.session.connection().connection
+    dbapi_conn.driver_connection.create_function('snapshot_datetime', 1, _sqlite_datetime, deterministic=True)
+    cursor = dbapi_conn.cursor()
+    kinds = (
+        ('tournament', Tournament, TOURNAMENT_FIELDS),
+        ('player', Player, PLAYER_FIELDS),
+        ('match', Match, MATCH_FIELDS),
+    )
+    for kind, _, _ in kinds:
+        cursor.execute(f'DROP TABLE IF EXISTS temp.snapshot_{kind}')
+        cursor.execute(f'CREATE TEMP TABLE snapshot_{kind} (lineno INTEGER PRIMARY KEY, line TEXT)')
+    try:
+        # O exportador sempre começa a linha por '{"type":"<tipo>"' (com ou sem
+        # espaço após ':'); outras formatações caem no json.loads.
+        prefixes = {f'{{"type":"{kind}"': kind for kind, _, _ in kinds}
+        prefix_end = len('{"type":"')
+        batches = {kind: [] for kind in prefixes.values()}
+
+        def flush():
+            for kind, batch in batches.items():
+                if batch:
+                    cursor.executemany(f'INSERT INTO temp.snapshot_{kind} VALUES (?, ?)', batch)
+                    batch.clear()
+
+        pending = 0
+        for lineno, line in enumerate(fp, start=2):
+            head = line[:24].replace(' ', '')
+            kind = prefixes.get(head[:head.find('"', prefix_end) + 1])
+            if kind is None:
+                if not line.strip():
+                    continue
+                try:
+                    kind = json.loads(line).get('type')
+                except (ValueError, AttributeError):
+                    raise SnapshotError(f'Linha {lineno} inválida.')
+                if kind not in batches:
+                    raise SnapshotError(f'Linha {lineno}: tipo de registro desconhecido: {kind!r}')
+            batches[kind].append((lineno, line))
+            pending += 1
+            if pending >= BATCH_SIZE:
+                flush()
+                pending = 0
+        flush()
+
+        for kind, model, fields in kinds:
+            _sqlite_check(cursor, kind)
+            columns = list(fields)
+            values = [_sqlite_extract(f, kind, offsets) for f in fields]
+            if kind == 'tournament':
+                columns.append('user_id')
+                values.append(str(int(user_id)))
+            try:
+                cursor.execute(
+                    f'INSERT INTO {model.__tablename__} ({", ".join(columns)}) '
+                    f'SELECT {", ".join(values)} FROM temp.snapshot_{kind} ORDER BY lineno'
+                )
+            except sqlite3.IntegrityError as exc:
+                raise SnapshotError(f'Registros de {kind} rejeitados pelo banco: {exc}')
+
+        return [row[0] for row in cursor.execute(
+            f"SELECT json_extract(line, '$.id') + {int(offsets['tournament'])} "
+            'FROM temp.snapshot_tournament ORDER BY lineno'
+        )]
+    finally:
+        for kind, _, _ in kinds:
+            cursor.execute(f'DROP TABLE IF EXISTS temp.snapshot_{kind}')
+
+def _load_generic(fp, user_id, offsets):
+    """executemany direto no DBAPI, dentro da transação da sessão."""
+    t_off, p_off, m_off = offsets['tournament'], offsets['player'], offsets['match']
+    conn = db.session.connection()
+    cursor = conn.connection.cursor()
+    statements = {}
+    for kind, model, fields in (
+        ('tournament', Tournament, ('user_id',) + TOURNAMENT_FIELDS),
+        ('player', Player, PLAYER_FIELDS),
+        ('match', Match, MATCH_FIELDS),
+    ):
+        compiled = model.__table__.insert().compile(dialect=conn.dialect, column_keys=list(fields))
+        if conn.dialect.positional:
+            order = [fields.index(k) for k in compiled.positiontup]
+            shape = (lambda order: lambda row: tuple(row[i] for i in order))(order)
+        else:
+            shape = (lambda fields: lambda row: dict(zip(fields, row)))(fields)
+        statements[kind] = (str(compiled), shape)
+
+    batches = {'tournament': [], 'player': [], 'match': []}
+    # Torneios antes de jogadores, jogadores antes de jogos
+    flush_order = ('tournament', 'player', 'match')
+    new_tournament_ids = []
+
+    def flush():
+        for kind in flush_order:
+            if batches[kind]:
+                sql, shape = statements[kind]
+                try:
+                    cursor.executemany(sql, [shape(row) for row in batches[kind]])
+                except conn.dialect.loaded_dbapi.IntegrityError as exc:
+                    raise SnapshotError(f'Registros de {kind} rejeitados pelo banco: {exc}')
+                batches[kind] = []
+
+    pending = 0
+    for lineno, line in enumerate(fp, start=2):
+        if not line.strip():
+            continue
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            raise SnapshotError(f'Linha {lineno} inválida.')
+        if not isinstance(rec, dict):
+            raise SnapshotError(f'Linha {lineno} inválida.')
+        kind = rec.get('type')
+        if kind not in FIELDS:
+            raise SnapshotError(f'Linha {lineno}: tipo de registro desconhecido: {kind!r}')
+        _check_record(kind, rec, lineno)
+        get = rec.get
+
+        if kind == 'match':
+            p1, p2, pw, nxt = get('player1_id'), get('player2_id'), get('winner_player_id'), get('next_match_id')
+            dt, dc = get('date_time'), get('decided_at')
+            row = (
+                rec['id'] + m_off, rec['tournament_id'] + t_off,
+                get('round_number'), get('position_in_round'),
+                p1 + p_off if p1 else None, p2 + p_off if p2 else None,
+                get('player1_placeholder'), get('player2_placeholder'),
+                pw + p_off if pw else None, get('winner_name'), get('score'),
+                _db_datetime(dt) if dt else None,
+                nxt + m_off if nxt else None, get('next_match_slot'),
+                _db_datetime(dc) if dc else None,
+            )
+        elif kind == 'player':
+            row = (rec['id'] + p_off, rec['tournament_id'] + t_off, get('name'))
+        elif kind == 'tournament':
+            ca = get('created_at')
+            row = (
+                user_id, rec['id'] + t_off, get('name'), get('stage'), get('size'),
+                get('is_random'), _db_datetime(ca) if ca else None,
+            )
+            new_tournament_ids.append(row[1])
+
+        batches[kind].append(row)
+        pending += 1
+        if pending >= BATCH_SIZE:
+            flush()
+            pending = 0
+
+    flush()
+    return new_tournament_ids
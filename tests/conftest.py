@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from app import create_app, init_db
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Fábrica de apps apontando para o mesmo banco SQLite temporário."""
+    db_uri = 'sqlite:///' + os.path.join(tmp_path, 'test.db')
+
+    def factory(**config):
+        app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': db_uri,
+            'AUTH_HASH_METHOD': 'pbkdf2:sha256:1000',
+            **config,
+        })
+        init_db(app)
+        return app
+
+    return factory
+
+def register_and_login(client, email='ana@example.com', password='segredo123'):
+    client.post('/register', data={
+        'name': 'Ana', 'email': email, 'password': password, 'confirm': password,
+    })
+    resp = client.post('/login', data={'email': email, 'password': password})
+    assert resp.status_code == 302
+    return resp
+
+def create_tournament(client, players=('Ana', 'Bia', 'Carla', 'Duda')):
+    data = {'name': 'Aberto', 'stage': '1', 'size': str(len(players))}
+    for i, name in enumerate(players, start=1):
+        data[f'player_{i}'] = name
+    resp = client.post('/new_tournament', data=data)
+    assert resp.status_code == 302
+    return int(resp.headers['Location'].rstrip('/').rsplit('/', 1)[-1])
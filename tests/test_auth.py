@@ -0,0 +1,132 @@
+import re
+import time
+
+import pytest
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+import auth
+from auth import HasherBusy, PasswordHasher, Throttle
+from models import db, User
+
+PASSWORD = 'segredo123'
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(auth.time, 'monotonic', clock)
+    return clock
+
+def _add_users(app, n):
+    pwhash = generate_password_hash(PASSWORD, method='pbkdf2:sha256:1000')
+    with app.app_context():
+        db.session.add_all([User(name=f'J{i}', email=f'j{i}@example.com', password_hash=pwhash)
+                            for i in range(n)])
+        db.session.commit()
+
+def _login(client, email, password=PASSWORD, **environ):
+    return client.post('/login', data={'email': email, 'password': password},
+                       environ_base={'REMOTE_ADDR': '10.0.0.1', **environ})
+
+def test_throttle_limits_and_expires(clock):
+    t = Throttle(limit=2, window=60)
+    assert t.hit('a') and t.hit('a')
+    assert not t.hit('a')
+    assert not t.allowed('a')
+    clock.now += 61
+    assert t.allowed('a')
+    assert len(t) == 0  # chave sem eventos na janela é descartada
+
+def test_throttle_key_count_is_bounded(clock):
+    t = Throttle(limit=5, window=60, max_keys=100)
+    for i in range(1000):
+        t.hit(f'spray{i}@example.com')
+    assert len(t) <= 100
+    # A chave mais recente continua contando
+    assert 'spray999@example.com' in t._hits
+
+def test_hasher_timeout_raises_busy(monkeypatch):
+    monkeypatch.setattr(auth, 'check_password_hash', lambda *a: time.sleep(0.5) or True)
+    hasher = PasswordHasher(max_workers=1, timeout=0.05)
+    try:
+        with pytest.raises(HasherBusy):
+            hasher.check('x', 'y')
+    finally:
+        hasher.shutdown()
+
+def test_login_hash_timeout_returns_503(make_app, monkeypatch):
+    monkeypatch.setattr(auth, 'check_password_hash', lambda *a: time.sleep(0.5) or True)
+    app = make_app(AUTH_HASH_TIMEOUT=0.05)
+    _add_users(app, 1)
+    assert _login(app.test_client(), 'j0@example.com').status_code == 503
+
+def test_shared_ip_burst_is_not_throttled(make_app):
+    app = make_app(AUTH_THROTTLE_IP_LIMIT=5)
+    _add_users(app, 30)
+    for i in range(30):
+        assert _login(app.test_client(), f'j{i}@example.com').status_code == 302
+
+    client = app.test_client()
+    for _ in range(5):
+        assert _login(client, 'j0@example.com', 'errada').status_code == 200
+    assert _login(client, 'j1@example.com').status_code == 429
+
+def test_proxy_fix_throttles_by_forwarded_client(make_app):
+    app = make_app(AUTH_THROTTLE_IP_LIMIT=2, PROXY_FIX_X_FOR=1)
+    _add_users(app, 1)
+    client = app.test_client()
+    for _ in range(2):
+        _login(client, 'j0@example.com', 'errada', HTTP_X_FORWARDED_FOR='203.0.113.7')
+    assert _login(client, 'j0@example.com', HTTP_X_FORWARDED_FOR='203.0.113.7').status_code == 429
+    assert _login(client, 'j0@example.com', HTTP_X_FORWARDED_FOR='203.0.113.8').status_code == 302
+
+def test_user_loader_uses_cache_within_ttl(make_app):
+    app = make_app()
+    _add_users(app, 1)
+    client = app.test_client()
+    assert _login(client, 'j0@example.com').status_code == 302
+
+    user_selects = []
+    def count(conn, cursor, statement, *args):
+        if re.search(r'\bFROM "?user"?(\s|$)', statement):
+            user_selects.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        for _ in range(3):
+            assert client.get('/my-tournaments').status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert len(user_selects) == 1
+
+def test_user_cache_cleared_on_logout_and_expiry(make_app, clock):
+    app = make_app(USER_CACHE_TTL=30)
+    _add_users(app, 1)
+    user_cache = app.extensions['user_cache']
+    with app.app_context():
+        user_id = User.query.filter_by(email='j0@example.com').one().id
+    client = app.test_client()
+
+    _login(client, 'j0@example.com')
+    client.get('/my-tournaments')
+    assert user_cache.get(user_id) is not None
+    client.get('/logout')
+    assert user_cache.get(user_id) is None
+
+    _login(client, 'j0@example.com')
+    client.get('/my-tournaments')
+    assert user_cache.get(user_id) is not None
+    clock.now += 31
+    assert user_cache.get(user_id) is None
+    # Depois de expirar, a próxima requisição recarrega o usuário do banco
+    assert client.get('/my-tournaments').status_code == 200
+    assert user_cache.get(user_id) is not None
@@ -0,0 +1,52 @@
+import pytest
+
+from bracket_cache import MemoryStore
+from models import Match
+from tests.conftest import create_tournament, register_and_login
+
+def _first_match_id(app, tournament_id):
+    with app.app_context():
+        m = Match.query.filter_by(tournament_id=tournament_id, round_number=1)\
+                       .order_by(Match.position_in_round).first()
+        return m.id
+
+@pytest.mark.parametrize('backend', ['memory', 'file', 'disabled'])
+def test_write_on_one_instance_invalidates_the_other(make_app, tmp_path, backend):
+    if backend == 'memory':
+        config = {'BRACKET_CACHE_STORE': MemoryStore()}
+    elif backend == 'file':
+        config = {'BRACKET_CACHE_DIR': str(tmp_path / 'cache')}
+    else:
+        config = {}
+    app_a = make_app(**config)
+    app_b = make_app(**config)
+    assert app_a.extensions['bracket_cache'].enabled == (backend != 'disabled')
+
+    client_a = app_a.test_client()
+    client_b = app_b.test_client()
+    register_and_login(client_a)
+    register_and_login(client_b)
+    tid = create_tournament(client_a)
+
+    # B aquece o cache antes da escrita em A
+    resp = client_b.get(f'/tournament/{tid}')
+    assert resp.status_code == 200
+    assert b'7-5 6-3' not in resp.data
+
+    match_id = _first_match_id(app_a, tid)
+    resp = client_a.post(f'/match/{match_id}/edit', data={'score': '7-5 6-3', 'winner': '1'})
+    assert resp.status_code == 302
+
+    resp = client_b.get(f'/tournament/{tid}')
+    assert b'7-5 6-3' in resp.data
+
+def test_cached_state_is_scoped_to_owner(make_app):
+    app = make_app(BRACKET_CACHE_STORE=MemoryStore())
+    owner = app.test_client()
+    other = app.test_client()
+    register_and_login(owner, email='dona@example.com')
+    register_and_login(other, email='outra@example.com')
+    tid = create_tournament(owner)
+
+    assert owner.get(f'/tournament/{tid}').status_code == 200
+    assert other.get(f'/tournament/{tid}').status_code == 404
@@ -0,0 +1,98 @@
+from models import db, Player, PlayerIdentity, Match, MatchResult
+from player_index import head_to_head, reindex_all
+from tests.conftest import create_tournament, register_and_login
+
+def _results(tournament_id):
+    return sorted(
+        (r.match_id, r.identity_id, r.opponent_identity_id, r.won, r.score, r.played_at)
+        for r in MatchResult.query.filter_by(tournament_id=tournament_id)
+    )
+
+def _decide_first_round(client, tournament_id, app):
+    with app.app_context():
+        match_ids = [m.id for m in Match.query.filter_by(tournament_id=tournament_id, round_number=1)]
+    for mid in match_ids:
+        client.post(f'/match/{mid}/edit', data={'score': '6-4 6-3', 'winner': '1'})
+    return match_ids
+
+def test_played_at_is_set_once(make_app):
+    app = make_app()
+    client = app.test_client()
+    register_and_login(client)
+    tid = create_tournament(client)
+    _decide_first_round(client, tid, app)
+
+    with app.app_context():
+        before = _results(tid)
+        names = {f'player_{p.id}': p.name for p in Player.query.filter_by(tournament_id=tid)}
+        row_ids = {r.id for r in MatchResult.query.filter_by(tournament_id=tid)}
+    assert len(before) == 4
+
+    # Salvar sem alterações não regrava o índice
+    client.post(f'/tournament/{tid}', data=names)
+    with app.app_context():
+        assert {r.id for r in MatchResult.query.filter_by(tournament_id=tid)} == row_ids
+
+    # Renomear refaz o índice, mas o played_at dos jogos sem horário não anda
+    names[next(iter(names))] = 'Ana Maria'
+    client.post(f'/tournament/{tid}', data=names)
+    with app.app_context():
+        after = _results(tid)
+        assert [r[-1] for r in after] == [r[-1] for r in before]
+        assert PlayerIdentity.query.filter_by(normalized_name='ana maria').count() == 1
+
+        # Linhas gravadas antes de decided_at existir também mantêm o played_at
+        Match.query.update({'decided_at': None})
+        db.session.commit()
+        reindex_all(db, [tid])
+        assert [r[-1] for r in _results(tid)] == [r[-1] for r in before]
+
+def test_reindex_all_matches_incremental_index(make_app):
+    app = make_app()
+    client = app.test_client()
+    register_and_login(client)
+    tid = create_tournament(client, players=('Ana', 'Bia', 'Carla', 'BYE'))
+    _decide_first_round(client, tid, app)
+
+    with app.app_context():
+        expected = _results(tid)
+        MatchResult.query.delete()
+        Player.query.update({'identity_id': None})
+        db.session.commit()
+
+        assert reindex_all(db, [tid]) == 1
+        assert _results(tid) == expected
+        assert Player.query.filter_by(name='BYE').one().identity_id is None
+
+        # Rodar de novo não duplica identidades nem linhas
+        reindex_all(db)
+        assert _results(tid) == expected
+        assert PlayerIdentity.query.count() == 3
+
+        row = MatchResult.query.first()
+        (ab,), (ba,) = head_to_head(row.identity_id, row.opponent_identity_id), \
+                       head_to_head(row.opponent_identity_id, row.identity_id)
+        assert ab.match_id == ba.match_id and ab.won != ba.won
+
+def test_correcting_earlier_round_reindexes_next_match(make_app):
+    app = make_app()
+    client = app.test_client()
+    register_and_login(client)
+    tid = create_tournament(client)
+    first_round = _decide_first_round(client, tid, app)
+    with app.app_context():
+        final_id = Match.query.filter_by(tournament_id=tid, round_number=2).one().id
+    client.post(f'/match/{final_id}/edit', data={'score': '7-5 6-4', 'winner': '1'})
+
+    # Corrigir o vencedor de um jogo da 1ª rodada troca um jogador da final
+    client.post(f'/match/{first_round[0]}/edit', data={'score': '6-4 6-3', 'winner': '2'})
+
+    with app.app_context():
+        incremental = _results(tid)
+        reindex_all(db, [tid])
+        assert _results(tid) == incremental
+        final = db.session.get(Match, final_id)
+        final_rows = MatchResult.query.filter_by(match_id=final_id).all()
+        players = {final.player1_id, final.player2_id}
+        assert {db.session.get(Player, pid).identity_id for pid in players} == \
+               {r.identity_id for r in final_rows}
@@ -0,0 +1,107 @@
+import io
+import json
+
+import pytest
+
+import snapshot
+from models import db, User, Tournament, Player, Match
+from snapshot import SnapshotError, dump_snapshot, load_snapshot
+from tests.conftest import create_tournament, register_and_login
+
+@pytest.fixture(params=['sqlite', 'generic'])
+def app(request, make_app, monkeypatch):
+    if request.param == 'generic':
+        monkeypatch.setattr(snapshot, '_is_sqlite', lambda: False)
+    app = make_app()
+    client = app.test_client()
+    register_and_login(client)
+    tid = create_tournament(client)
+    with app.app_context():
+        m = Match.query.filter_by(tournament_id=tid, round_number=1).first()
+    client.post(f'/match/{m.id}/edit', data={'score': '6-4 7-6', 'winner': '2'})
+    client.post(f'/tournament/{tid}', data={f'match_dt_{m.id}': '2025-09-01T18:30'})
+    return app
+
+def _bracket(t):
+    """Torneio como estrutura comparável, sem depender dos ids."""
+    players = {p.id: p.name for p in t.players}
+    matches = {m.id: m for m in t.matches}
+    return {
+        'name': t.name, 'stage': t.stage, 'size': t.size, 'is_random': t.is_random,
+        'created_at': t.created_at,
+        'players': sorted(players.values()),
+        'matches': sorted(
+            (m.round_number, m.position_in_round, players.get(m.player1_id), players.get(m.player2_id),
+             m.player1_placeholder, m.player2_placeholder, players.get(m.winner_player_id),
+             m.winner_name, m.score, m.date_time,
+             (matches[m.next_match_id].round_number, matches[m.next_match_id].position_in_round)
+             if m.next_match_id else None, m.next_match_slot)
+            for m in t.matches
+        ),
+    }
+
+def test_round_trip_preserves_bracket(app):
+    with app.app_context():
+        owner = User.query.first()
+        other = User(name='Bia', email='bia@example.com', password_hash='-')
+        db.session.add(other)
+        db.session.commit()
+
+        buf = io.StringIO()
+        count = dump_snapshot(buf, user_id=owner.id)
+        assert count == 1 + 4 + 3
+
+        buf.seek(0)
+        new_ids = load_snapshot(buf, other.id)
+        assert len(new_ids) == 1
+
+        original = Tournament.query.filter_by(user_id=owner.id).one()
+        restored = db.session.get(Tournament, new_ids[0])
+        assert restored.user_id == other.id
+        assert _bracket(restored) == _bracket(original)
+        assert any(m.date_time for m in restored.matches)
+
+def test_rejects_invalid_lines(app):
+    with app.app_context():
+        owner = User.query.first()
+        buf = io.StringIO()
+        dump_snapshot(buf, user_id=owner.id)
+        lines = buf.getvalue().splitlines()
+
+        with pytest.raises(SnapshotError, match='Linha 3 inválida'):
+            load_snapshot(io.StringIO('\n'.join(lines[:2] + ['{quebrado'] + lines[2:])), owner.id)
+        db.session.rollback()
+
+        # Prefixo válido, JSON truncado: só falha no parse do banco/json.loads
+        with pytest.raises(SnapshotError, match='Linha 4 inválida'):
+            load_snapshot(io.StringIO('\n'.join(lines[:3] + ['{"type":"player","id":'] + lines[3:])), owner.id)
+        db.session.rollback()
+
+        with pytest.raises(SnapshotError, match='desconhecido'):
+            load_snapshot(io.StringIO('\n'.join(lines[:2] + ['{"type":"court","id":1}'])), owner.id)
+        db.session.rollback()
+
+        with pytest.raises(SnapshotError, match='cabeçalho'):
+            load_snapshot(io.StringIO('nada\n'), owner.id)
+        db.session.rollback()
+
+        # JSON válido com conteúdo inválido: mesmo erro nos dois caminhos
+        records = [json.loads(line) for line in lines]
+        match_line = next(i for i, r in enumerate(records) if r['type'] == 'match' and r['next_match_id'])
+        cases = [
+            (1, {'created_at': 'ontem'}, 'Linha 2: data/hora inválida em created_at'),
+            (1, {'id': '1'}, 'Linha 2: id inválido'),
+            (2, {'id': None}, 'Linha 3: campo obrigatório ausente: id'),
+            (2, {'tournament_id': 99}, 'tournament_id=99 não aponta'),
+            (3, {'id': records[2]['id']}, 'rejeitados pelo banco'),
+            (match_line, {'player1_id': 999}, 'player1_id=999 não aponta'),
+            (match_line, {'next_match_id': 999}, 'next_match_id=999 não aponta'),
+        ]
+        for index, changes, message in cases:
+            changed = [json.dumps({**r, **changes}) if i == index else lines[i] for i, r in enumerate(records)]
+            with pytest.raises(SnapshotError, match=message):
+                load_snapshot(io.StringIO('\n'.join(changed)), owner.id)
+            db.session.rollback()
+
+        assert Tournament.query.count() == 1
+        assert Player.query.count() == 4